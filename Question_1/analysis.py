@@ -1,36 +1,142 @@
 import pandas as pd
+import numpy as np
 import argparse
+import os
+import sys
 
-def compute_metrics(csv_file):
-    # Read CSV data
-    df = pd.read_csv(csv_file)
+# instrumentation.py lives at the repository root.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import instrumentation
+from instrumentation import stage
 
-    # Ensure required columns exist
-    if 'Time' not in df.columns or 'Length' not in df.columns:
-        print("CSV must contain 'Time' and 'Length' columns.")
-        return
+# pyarrow fails when one row straddles two read blocks, and Info fields in
+# the captures can run to a few kilobytes, so blocks are never smaller than this.
+PYARROW_BLOCK_BYTES = 1 << 20
 
-    # Convert Time and Length to numeric values
-    df['Time'] = pd.to_numeric(df['Time'], errors='coerce')
-    df['Length'] = pd.to_numeric(df['Length'], errors='coerce').fillna(0)
+def read_chunks(csv_file, chunksize, use_pyarrow=False, block_bytes=PYARROW_BLOCK_BYTES):
+    """
+    Yield the CSV as DataFrames of bounded size: chunksize rows with pandas,
+    or record batches of about block_bytes with pyarrow. The pyarrow reader
+    reads every column as a string and they are converted later, since
+    types inferred from the first block may not fit later ones.
+    """
+    if use_pyarrow:
+        import pyarrow as pa
+        import pyarrow.csv as pv
+        header = pd.read_csv(csv_file, nrows=0).columns
+        reader = pv.open_csv(csv_file,
+                             read_options=pv.ReadOptions(block_size=max(block_bytes, PYARROW_BLOCK_BYTES)),
+                             convert_options=pv.ConvertOptions(
+                                 column_types={name: pa.string() for name in header}))
+        for batch in reader:
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(csv_file, chunksize=chunksize)
 
-    # Compute capture duration
-    duration = df['Time'].max() - df['Time'].min()
-    if duration <= 0:
-        print("Invalid capture duration. Check the 'Time' column in the CSV.")
-        return
+def add_seen(runs, values):
+    """
+    Membership test and insert for a set of uint64 hashes kept as sorted
+    runs whose sizes roughly double, so each value is merged O(log n) times.
+    values must be sorted and unique. Returns a mask of the values that
+    were already in the set.
+    """
+    seen = np.zeros(len(values), dtype=bool)
+    for run in runs:
+        pos = np.searchsorted(run, values)
+        seen |= run[np.minimum(pos, len(run) - 1)] == values
+    if not seen.all():
+        runs.append(values[~seen])
+    while len(runs) > 1 and len(runs[-2]) <= 2 * len(runs[-1]):
+        last = runs.pop()
+        runs[-1] = np.union1d(runs[-1], last)
+    return seen
 
-    # Compute Goodput (in bits per second)
-    total_payload = df['Length'].sum()
-    goodput_bps = (total_payload * 8) / duration
+def stream_metrics(csv_file, chunksize, use_pyarrow=False, block_bytes=PYARROW_BLOCK_BYTES):
+    """
+    Same metrics as compute_metrics, from running aggregates over chunks.
+    Duplicate detection keeps 64-bit hashes of the Info values seen so far
+    instead of the strings themselves, so it needs 8 bytes per distinct
+    Info value; everything else is bounded by the chunk size.
+    """
+    time_min = float('inf')
+    time_max = float('-inf')
+    total_payload = 0
+    total_packets = 0
+    duplicate_packets = 0
+    seen_info = []
+    has_info = None
+
+    for chunk in read_chunks(csv_file, chunksize, use_pyarrow, block_bytes):
+        if 'Time' not in chunk.columns or 'Length' not in chunk.columns:
+            return None
+        if has_info is None:
+            has_info = 'Info' in chunk.columns
+        times = pd.to_numeric(chunk['Time'], errors='coerce')
+        time_min = min(time_min, times.min())
+        time_max = max(time_max, times.max())
+        total_payload += pd.to_numeric(chunk['Length'], errors='coerce').fillna(0).sum()
+        total_packets += len(chunk)
 
-    # Packet Loss Rate Estimation
-    if 'Info' in df.columns:
-        duplicate_packets = df['Info'].duplicated().sum()  # Approximation for retransmissions
+        if has_info:
+            hashes = pd.util.hash_pandas_object(chunk['Info'], index=False).to_numpy()
+            unique = np.unique(hashes)
+            # Repeats within the chunk, plus first occurrences already seen in earlier chunks.
+            duplicate_packets += len(hashes) - len(unique) + int(add_seen(seen_info, unique).sum())
+
+    if has_info is None:
+        return None
+    return time_max - time_min, total_payload, total_packets, duplicate_packets
+
+def compute_metrics(csv_file, chunksize=None, use_pyarrow=False, block_bytes=PYARROW_BLOCK_BYTES):
+    if chunksize or use_pyarrow:
+        # Streaming path: memory is bounded by the chunk or block size, not the capture size,
+        # apart from 8 bytes per distinct Info value for the duplicate estimate.
+        # Reading, parsing and aggregation are interleaved, so they are one stage.
+        with stage('stream') as stream_stage:
+            result = stream_metrics(csv_file, chunksize, use_pyarrow, block_bytes)
+            if result is None:
+                print("CSV must contain 'Time' and 'Length' columns.")
+                return
+            duration, total_payload, total_packets, duplicate_packets = result
+            stream_stage.rows = total_packets
+        if not duration > 0:
+            print("Invalid capture duration. Check the 'Time' column in the CSV.")
+            return
     else:
-        duplicate_packets = 0  # No Info field, cannot estimate loss effectively
+        # Read CSV data
+        with stage('read') as read_stage:
+            df = pd.read_csv(csv_file)
+            read_stage.rows = len(df)
+
+        # Ensure required columns exist
+        if 'Time' not in df.columns or 'Length' not in df.columns:
+            print("CSV must contain 'Time' and 'Length' columns.")
+            return
 
-    total_packets = len(df)
+        # Convert Time and Length to numeric values
+        with stage('parse', rows=len(df)):
+            df['Time'] = pd.to_numeric(df['Time'], errors='coerce')
+            df['Length'] = pd.to_numeric(df['Length'], errors='coerce').fillna(0)
+
+        with stage('aggregate', rows=len(df)):
+            # Compute capture duration
+            duration = df['Time'].max() - df['Time'].min()
+            if duration <= 0:
+                print("Invalid capture duration. Check the 'Time' column in the CSV.")
+                return
+
+            total_payload = df['Length'].sum()
+
+            # Packet Loss Rate Estimation
+            if 'Info' in df.columns:
+                duplicate_packets = df['Info'].duplicated().sum()  # Approximation for retransmissions
+            else:
+                duplicate_packets = 0  # No Info field, cannot estimate loss effectively
+
+            total_packets = len(df)
+
+    # Compute Goodput (in bits per second)
+    goodput_bps = (total_payload * 8) / duration
     packet_loss_rate = (duplicate_packets / total_packets * 100) if total_packets > 0 else 0
 
     # Print results
@@ -46,5 +152,16 @@ if __name__ == "__main__":
         description="Calculate Goodput and Approximate Packet Loss Rate from CSV"
     )
     parser.add_argument("csv_file", help="Path to the CSV file (e.g., h1_parta.csv)")
+    parser.add_argument("--chunksize", type=int,
+                        help="Stream the CSV in chunks of this many rows instead of loading it whole "
+                             "(the duplicate estimate still keeps 8 bytes per distinct Info value)")
+    parser.add_argument("--pyarrow", action="store_true",
+                        help="Stream the CSV with pyarrow's CSV reader instead of pandas")
+    parser.add_argument("--block-bytes", type=int, default=PYARROW_BLOCK_BYTES,
+                        help="Read block size in bytes for --pyarrow (default and minimum: 1 MiB)")
+    instrumentation.add_arguments(parser)
     args = parser.parse_args()
-    compute_metrics(args.csv_file)
+    instrumentation.enable_from_args(args)
+    compute_metrics(args.csv_file, chunksize=args.chunksize, use_pyarrow=args.pyarrow,
+                    block_bytes=args.block_bytes)
+    instrumentation.finish(args.instrument)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import io
+import json
+import os
+import re
+
+import pandas as pd
+
+# Ports as Wireshark shows them at the start of Info, e.g. "51854  >  5201 [ACK] ...".
+INFO_PORTS = re.compile(r'(\d+)\s+(?:>|→)\s+(\d+)')
+REQUIRED_COLUMNS = ('Time', 'Length', 'Source', 'Destination')
+
+def index_path(csv_file):
+    return csv_file + '.idx.json'
+
+def build_index(csv_file, block_seconds=1.0):
+    """
+    Scan a Wireshark CSV export once and record, for every flow and every
+    block of block_seconds, the byte range and row range it occupies in the
+    file along with packet, byte and retransmission counts. Assumes one
+    packet per line, which holds for Wireshark's CSV export.
+    Returns None if the CSV lacks a required column.
+    """
+    entries = {}
+    with open(csv_file, 'rb') as f:
+        header_line = f.readline()
+        header = next(csv.reader([header_line.decode('utf-8')]), [])
+        col = {name: i for i, name in enumerate(header)}
+        missing = [name for name in REQUIRED_COLUMNS if name not in col]
+        if missing:
+            print("CSV must contain 'Time', 'Length', 'Source' and 'Destination' columns; missing: {}".format(
+                ', '.join("'{}'".format(name) for name in missing)))
+            return None
+        offset = len(header_line)
+        row = 0
+        for line in f:
+            start = offset
+            offset += len(line)
+            row += 1
+            fields = next(csv.reader([line.decode('utf-8', 'replace')]), [])
+            try:
+                time_rel = float(fields[col['Time']])
+                length = int(fields[col['Length']])
+                src, dst = fields[col['Source']], fields[col['Destination']]
+            except (ValueError, IndexError):
+                continue
+            info = fields[col['Info']] if 'Info' in col and len(fields) > col['Info'] else ''
+            ports = INFO_PORTS.search(info)
+            src_port, dst_port = ports.groups() if ports else ('', '')
+            key = (src, src_port, dst, dst_port, int(time_rel // block_seconds))
+
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = {'t_start': time_rel, 't_end': time_rel,
+                                        'offset_start': start, 'offset_end': offset,
+                                        'row_start': row, 'row_end': row,
+                                        'packets': 0, 'bytes': 0, 'retransmits': 0}
+            entry['t_start'] = min(entry['t_start'], time_rel)
+            entry['t_end'] = max(entry['t_end'], time_rel)
+            entry['offset_end'] = offset
+            entry['row_end'] = row
+            entry['packets'] += 1
+            entry['bytes'] += length
+            if 'Retransmission' in info:
+                entry['retransmits'] += 1
+
+    blocks = []
+    for (src, src_port, dst, dst_port, block), entry in entries.items():
+        entry.update({'src': src, 'src_port': src_port, 'dst': dst, 'dst_port': dst_port, 'block': block})
+        blocks.append(entry)
+    stat = os.stat(csv_file)
+    index = {'source': os.path.basename(csv_file), 'size': stat.st_size, 'mtime': stat.st_mtime,
+             'block_seconds': block_seconds, 'header': header, 'rows': row, 'blocks': blocks}
+    with open(index_path(csv_file), 'w') as f:
+        json.dump(index, f)
+    return index
+
+def load_index(csv_file):
+    with open(index_path(csv_file)) as f:
+        index = json.load(f)
+    stat = os.stat(csv_file)
+    if index['size'] != stat.st_size or index['mtime'] != stat.st_mtime:
+        raise ValueError("Index for {} is stale; rebuild it with 'build'".format(csv_file))
+    return index
+
+def flow_matches(entry, src=None, src_port=None, dst=None, dst_port=None):
+    return ((src is None or entry['src'] == src) and (src_port is None or entry['src_port'] == src_port)
+            and (dst is None or entry['dst'] == dst) and (dst_port is None or entry['dst_port'] == dst_port))
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def read_ranges(csv_file, header, ranges):
+    """Read only the given byte ranges of the capture into one DataFrame."""
+    frames = []
+    with open(csv_file, 'rb') as f:
+        for start, end in ranges:
+            f.seek(start)
+            frames.append(pd.read_csv(io.BytesIO(f.read(end - start)), header=None, names=header))
+    if not frames:
+        return pd.DataFrame(columns=header)
+    df = pd.concat(frames, ignore_index=True)
+    df['Time'] = pd.to_numeric(df['Time'], errors='coerce')
+    df['Length'] = pd.to_numeric(df['Length'], errors='coerce')
+    ports = df['Info'].astype(str).str.extract(INFO_PORTS.pattern)
+    df['src_port'] = ports[0].fillna('')
+    df['dst_port'] = ports[1].fillna('')
+    return df
+
+def filter_rows(df, src=None, src_port=None, dst=None, dst_port=None, start=None, end=None):
+    mask = pd.Series(True, index=df.index)
+    for column, value in (('Source', src), ('src_port', src_port), ('Destination', dst), ('dst_port', dst_port)):
+        if value is not None:
+            mask &= df[column].astype(str) == value
+    if start is not None:
+        mask &= df['Time'] >= start
+    if end is not None:
+        mask &= df['Time'] < end
+    return df[mask]
+
+def query(csv_file, index, src=None, src_port=None, dst=None, dst_port=None,
+          start=None, end=None, rows=False):
+    """
+    Summarize the packets of the matching flows in [start, end).
+    Blocks that lie entirely inside the range are answered from the index;
+    only blocks cut by the range edges (or all matching blocks, with
+    rows=True) are read back from the capture.
+    Returns (summary dict, DataFrame of rows or None).
+    """
+    block_seconds = index['block_seconds']
+    lo = float('-inf') if start is None else start
+    hi = float('inf') if end is None else end
+
+    full, partial = [], []
+    for entry in index['blocks']:
+        if not flow_matches(entry, src, src_port, dst, dst_port):
+            continue
+        block_lo = entry['block'] * block_seconds
+        block_hi = block_lo + block_seconds
+        if block_hi <= lo or block_lo >= hi:
+            continue
+        if lo <= block_lo and block_hi <= hi and not rows:
+            full.append(entry)
+        else:
+            partial.append(entry)
+
+    summary = {
+        'packets': sum(e['packets'] for e in full),
+        'bytes': sum(e['bytes'] for e in full),
+        'retransmits': sum(e['retransmits'] for e in full),
+        'flows': len({(e['src'], e['src_port'], e['dst'], e['dst_port']) for e in full + partial}),
+        'blocks_from_index': len(full),
+        'blocks_scanned': len(partial),
+    }
+    ranges = merge_ranges([(e['offset_start'], e['offset_end']) for e in partial])
+    summary['bytes_read'] = sum(e - s for s, e in ranges)
+    summary['file_size'] = index['size']
+
+    selected = None
+    if partial:
+        selected = filter_rows(read_ranges(csv_file, index['header'], ranges),
+                               src, src_port, dst, dst_port, start, end)
+        summary['packets'] += len(selected)
+        summary['bytes'] += int(selected['Length'].sum())
+        summary['retransmits'] += int(selected['Info'].astype(str).str.contains('Retransmission').sum())
+
+    times = [e['t_start'] for e in full + partial] + [e['t_end'] for e in full + partial]
+    span_lo = max(lo, min(times)) if times else 0
+    span_hi = min(hi, max(times)) if times else 0
+    duration = span_hi - span_lo
+    summary['throughput_bps'] = summary['bytes'] * 8 / duration if duration > 0 else 0
+    return summary, selected if rows else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build a per-flow, per-time-block index of a Wireshark CSV capture and query it"
+    )
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="Index a capture (written next to it as <csv>.idx.json)")
+    build.add_argument("csv_file", help="Path to the CSV file (e.g., partc2c_bic_s1eth1.csv)")
+    build.add_argument("--block", type=float, default=1.0, help="Time block in seconds (default: 1.0)")
+    ask = sub.add_parser('query', help="Summarize matching flows in a time range using the index")
+    ask.add_argument("csv_file", help="Path to the indexed CSV file")
+    ask.add_argument("--src", help="Source IP (e.g. 10.0.0.3 for h3)")
+    ask.add_argument("--src-port", help="Source port")
+    ask.add_argument("--dst", help="Destination IP (e.g. 10.0.0.7 for h7)")
+    ask.add_argument("--dst-port", help="Destination port (e.g. 5202)")
+    ask.add_argument("--start", type=float, help="Range start in capture seconds")
+    ask.add_argument("--end", type=float, help="Range end in capture seconds (exclusive)")
+    ask.add_argument("--rows", action="store_true", help="Also print the matching packets")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        index = build_index(args.csv_file, args.block)
+        if index is None:
+            raise SystemExit(1)
+        print("Indexed {} rows into {} flow blocks: {}".format(
+            index['rows'], len(index['blocks']), index_path(args.csv_file)))
+    else:
+        index = load_index(args.csv_file)
+        summary, selected = query(args.csv_file, index, args.src, args.src_port, args.dst, args.dst_port,
+                                  args.start, args.end, rows=args.rows)
+        print("Matching flows: {}".format(summary['flows']))
+        print("Packets: {}".format(summary['packets']))
+        print("Bytes (from Length column): {}".format(summary['bytes']))
+        print("Retransmissions: {}".format(summary['retransmits']))
+        print("Throughput: {:.2f} bits per second".format(summary['throughput_bps']))
+        print("Blocks answered from index: {}, blocks scanned: {} ({} of {} bytes read)".format(
+            summary['blocks_from_index'], summary['blocks_scanned'], summary['bytes_read'], summary['file_size']))
+        if selected is not None:
+            print(selected.drop(columns=['src_port', 'dst_port']).to_string(index=False))
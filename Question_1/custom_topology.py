@@ -2,8 +2,15 @@
 import argparse
 import time
 import os
+import io
+import re
+import csv
+import math
 import sys
+import subprocess
 import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 
 from mininet.topo import Topo
 from mininet.net import Mininet
@@ -12,6 +19,9 @@ from mininet.log import setLogLevel, info
 # import cli
 from mininet.cli import CLI
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from confidence import mean_ci
+
 # Define a custom topology that builds the network based on the experiment option.
 class CustomTopo(Topo):
     def __init__(self, option='a', scenario=None, loss=0, **opts):
@@ -71,6 +81,65 @@ class CustomTopo(Topo):
                          )
 
 
+# Per-interface capture: tcpdump keeps only the first snaplen bytes of each
+# frame (enough for Ethernet/IP/TCP headers); frame.len still holds the
+# original length, so goodput is unaffected.
+def start_captures(interfaces, capture_dir, tag, snaplen):
+    os.makedirs(capture_dir, exist_ok=True)
+    captures = []
+    for intf in interfaces:
+        # e.g. partc2c_bic_s1eth1.pcap, matching the names of the exported CSVs.
+        pcap_file = os.path.join(capture_dir, '{}_{}.pcap'.format(tag, intf.replace('-', '')))
+        info('*** Capturing on {} into {}\n'.format(intf, pcap_file))
+        proc = subprocess.Popen(['tcpdump', '-i', intf, '-s', str(snaplen), '-w', pcap_file],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        captures.append((proc, pcap_file))
+    # Give tcpdump time to open the interfaces before traffic starts.
+    time.sleep(1)
+    return captures
+
+def stop_captures(captures):
+    for proc, _ in captures:
+        proc.terminate()
+    for proc, _ in captures:
+        proc.wait()
+    return [pcap_file for _, pcap_file in captures]
+
+def analyze_capture(pcap_file):
+    # Export the columns compute_metrics reads, then run it on the CSV.
+    from analysis import compute_metrics
+
+    csv_file = os.path.splitext(pcap_file)[0] + '.csv'
+    # Column fields are _ws.col.Protocol/_ws.col.Info before tshark 4.2 and lowercase after.
+    for protocol_field, info_field in (('_ws.col.protocol', '_ws.col.info'), ('_ws.col.Protocol', '_ws.col.Info')):
+        result = subprocess.run(['tshark', '-r', pcap_file, '-T', 'fields',
+                                 '-e', 'frame.time_relative', '-e', 'ip.src', '-e', 'ip.dst',
+                                 '-e', protocol_field, '-e', 'frame.len', '-e', info_field,
+                                 '-E', 'separator=,', '-E', 'quote=d'],
+                                capture_output=True, text=True)
+        if result.returncode == 0:
+            break
+    else:
+        return csv_file, 'tshark failed on {}: {}'.format(pcap_file, result.stderr)
+    # Same column names as a Wireshark GUI export, so capture_index.py can index it.
+    with open(csv_file, 'w') as f:
+        f.write('"Time","Source","Destination","Protocol","Length","Info"\n')
+        f.write(result.stdout)
+
+    report = io.StringIO()
+    with redirect_stdout(report):
+        compute_metrics(csv_file)
+    return csv_file, report.getvalue()
+
+def analyze_captures(pcap_files):
+    # One worker per interface; reports are printed in interface order.
+    if not pcap_files:
+        return
+    with ProcessPoolExecutor(max_workers=len(pcap_files)) as pool:
+        for csv_file, report in pool.map(analyze_capture, pcap_files):
+            info('*** Metrics for {}\n'.format(csv_file))
+            info(report + '\n')
+
 # Experiment (a): Single flow (client on H1, server on H7).
 def run_experiment_a(net, cc_scheme):
     h1 = net.get('h1')
@@ -159,6 +228,116 @@ def run_experiment_c(net, cc_scheme, scenario):
         t1.start(); t3.start(); t4.start()
         t1.join(); t3.join(); t4.join()
 
+# Client hosts and server ports used by each experiment c scenario.
+SCENARIO_CLIENTS = {
+    'c1': [('h3', 5201)],
+    'c2a': [('h1', 5201), ('h2', 5202)],
+    'c2b': [('h1', 5201), ('h3', 5202)],
+    'c2c': [('h1', 5201), ('h3', 5202), ('h4', 5203)],
+    'c2d': [('h1', 5201), ('h3', 5202), ('h4', 5203)],
+}
+
+# iperf3 interval line, e.g. "[SUM]   3.00-4.00   sec  1.19 MBytes  10.0 Mbits/sec    0"
+IPERF_INTERVAL = re.compile(r'^\[SUM\]\s+([\d.]+)-([\d.]+)\s+sec\s+[\d.]+ \w?Bytes\s+([\d.]+) ([KMG]?)bits/sec')
+MBITS = {'': 1e-6, 'K': 1e-3, 'M': 1.0, 'G': 1e3}
+
+def set_link_loss(net, loss):
+    # Reconfigure the s2-s3 TCLink in place; both ends get the same netem loss.
+    for link in net.linksBetween(net.get('s2'), net.get('s3')):
+        link.intf1.config(bw=50, loss=loss)
+        link.intf2.config(bw=50, loss=loss)
+
+def read_intervals(proc, samples, lock):
+    # Collect the per-second [SUM] rate (Mbit/s) of one iperf3 client.
+    for line in proc.stdout:
+        match = IPERF_INTERVAL.match(line)
+        if not match:
+            continue
+        start, end, rate, unit = match.groups()
+        # Skip the final summary line, which spans the whole run.
+        if float(end) - float(start) > 1.5:
+            continue
+        with lock:
+            samples.setdefault(int(round(float(end))), []).append(float(rate) * MBITS[unit])
+
+def window_estimate(series, window):
+    """Mean and 95% CI half-width of the last `window` samples."""
+    mean, half_width = mean_ci(series[-window:])
+    # A single sample has no spread estimate, so it never counts as converged.
+    return float(mean), float('inf') if math.isnan(half_width) else float(half_width)
+
+def run_until_converged(net, cc_scheme, scenario, max_time, warmup, window, tolerance):
+    """
+    Run the scenario's iperf3 clients and stop them as soon as the aggregate
+    goodput over the last `window` seconds has a 95% CI within `tolerance`
+    (relative) of its mean, or after max_time seconds.
+    Returns (goodput_mbps, ci_mbps, elapsed, converged).
+    """
+    h7 = net.get('h7')
+    samples = {}
+    lock = threading.Lock()
+    procs = []
+    for host_name, port in SCENARIO_CLIENTS[scenario]:
+        proc = net.get(host_name).popen(
+            ['iperf3', '-c', h7.IP(), '-p', str(port), '-b', '10M', '-P', '10',
+             '-t', str(max_time), '-i', '1', '--forceflush', '-C', cc_scheme],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+        threading.Thread(target=read_intervals, args=(proc, samples, lock), daemon=True).start()
+        procs.append(proc)
+
+    start = time.time()
+    mean, half_width, converged = 0.0, float('inf'), False
+    series = []
+    while any(proc.poll() is None for proc in procs):
+        time.sleep(0.5)
+        with lock:
+            # A second counts once every client has reported it.
+            series = [sum(rates) for second, rates in sorted(samples.items())
+                      if second > warmup and len(rates) == len(procs)]
+        if len(series) >= window:
+            mean, half_width = window_estimate(series, window)
+            if mean > 0 and half_width <= tolerance * mean:
+                converged = True
+                break
+    elapsed = time.time() - start
+
+    for proc in procs:
+        if proc.poll() is None:
+            proc.terminate()
+        proc.wait()
+    if not converged and series:
+        mean, half_width = window_estimate(series, window)
+    return mean, half_width, elapsed, converged
+
+def run_loss_sweep(net, cc_schemes, scenario, losses, out_file, max_time=150, warmup=5,
+                   window=10, tolerance=0.05):
+    h7 = net.get('h7')
+    info('*** Starting iperf3 server on h7\n')
+    for _, port in SCENARIO_CLIENTS[scenario]:
+        h7.cmd('iperf3 -s -D -p {}'.format(port))
+    time.sleep(2)
+
+    rows = []
+    for cc_scheme in cc_schemes:
+        for loss in losses:
+            set_link_loss(net, loss)
+            info('*** {} at {}% loss on s2-s3\n'.format(cc_scheme, loss))
+            goodput, ci, elapsed, converged = run_until_converged(
+                net, cc_scheme, scenario, max_time, warmup, window, tolerance)
+            info('*** {} loss={}%: goodput {:.2f} +/- {:.2f} Mbit/s after {:.0f} s{}\n'.format(
+                cc_scheme, loss, goodput, ci, elapsed, '' if converged else ' (not converged)'))
+            rows.append([cc_scheme, loss, round(goodput, 4), round(ci, 4), round(elapsed, 1), converged])
+            # Let the servers go back to listening before the next run.
+            time.sleep(2)
+
+    with open(out_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['cc', 'loss', 'goodput_mbps', 'ci_mbps', 'duration_s', 'converged'])
+        writer.writerows(rows)
+    total = sum(row[4] for row in rows)
+    info('*** Goodput-vs-loss curve written to {} ({:.0f} s total, {:.0f} s with fixed {} s runs)\n'.format(
+        out_file, total, max_time * len(rows), max_time))
+
 if __name__ == '__main__':
     setLogLevel('info')
     
@@ -169,8 +348,29 @@ if __name__ == '__main__':
                         help='TCP Congestion Control scheme')
     parser.add_argument('--scenario', choices=['c1', 'c2a', 'c2b', 'c2c', 'c2d'],
                         help='Experiment c scenario (required for option c)')
-    parser.add_argument('--loss', type=int, default=0,
+    parser.add_argument('--loss', type=float, default=0,
                         help='Link loss percentage for link S2-S3 (only for experiment c)')
+    parser.add_argument('--sweep-loss', type=float, nargs='+',
+                        help='Loss percentages to sweep on S2-S3, each run stopped once goodput converges '
+                             '(experiment c only, e.g. --sweep-loss 0 0.1 0.25 0.5 1 2)')
+    parser.add_argument('--sweep-cc', nargs='+', choices=['bic', 'highspeed', 'yeah'],
+                        help='Congestion control schemes for --sweep-loss (default: --cc)')
+    parser.add_argument('--max-time', type=int, default=150,
+                        help='Upper bound on each sweep run in seconds (default: 150)')
+    parser.add_argument('--window', type=int, default=10,
+                        help='Seconds of goodput in the convergence window (default: 10)')
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help='Stop when the 95%% CI half-width is within this fraction of the mean (default: 0.05)')
+    parser.add_argument('--sweep-out', default='loss_sweep.csv',
+                        help='CSV file for the goodput-vs-loss curve (default: loss_sweep.csv)')
+    parser.add_argument('--capture', nargs='+', default=['s1-eth1', 's2-eth1'],
+                        help='Interfaces to capture on during the experiment (default: s1-eth1 s2-eth1)')
+    parser.add_argument('--no-capture', action='store_true',
+                        help='Disable the built-in capture and analysis')
+    parser.add_argument('--capture-dir', default='captures',
+                        help='Directory for the pcap and CSV files (default: captures)')
+    parser.add_argument('--snaplen', type=int, default=128,
+                        help='Bytes captured per frame; 128 keeps the headers (default: 128)')
     args = parser.parse_args()
     
     # Clean up any leftover Mininet state.
@@ -183,6 +383,9 @@ if __name__ == '__main__':
             print("For experiment c, please specify --scenario")
             sys.exit(1)
         topo = CustomTopo(option='c', scenario=args.scenario, loss=args.loss)
+    if args.sweep_loss and args.option != 'c':
+        print("--sweep-loss is only available for experiment c")
+        sys.exit(1)
     
     # Create the network without any controller.
     net = Mininet(topo=topo, controller=None, link=TCLink)
@@ -197,6 +400,19 @@ if __name__ == '__main__':
 
     time.sleep(10)
     
+    if args.sweep_loss:
+        # The sweep replaces the fixed-length run; captures are not taken.
+        run_loss_sweep(net, args.sweep_cc or [args.cc], args.scenario, args.sweep_loss, args.sweep_out,
+                       max_time=args.max_time, window=args.window, tolerance=args.tolerance)
+        CLI(net)
+        net.stop()
+        sys.exit(0)
+
+    captures = []
+    if not args.no_capture:
+        tag = 'part{}_{}'.format(args.scenario if args.option == 'c' else args.option, args.cc)
+        captures = start_captures(args.capture, args.capture_dir, tag, args.snaplen)
+
     # Run the experiment based on the option.
     if args.option == 'a':
         run_experiment_a(net, args.cc)
@@ -205,6 +421,10 @@ if __name__ == '__main__':
     elif args.option == 'c':
         run_experiment_c(net, args.cc, args.scenario)
     
+    # Stop the captures and analyze every interface in parallel.
+    if captures:
+        analyze_captures(stop_captures(captures))
+
 
     CLI(net)
     net.stop()
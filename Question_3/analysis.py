@@ -1,72 +1,573 @@
 #!/usr/bin/env python3
 import pandas as pd
+import numpy as np
 import argparse
+import csv
+import os
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
-def analyze_csv(csv_file):
-    # Load CSV file into DataFrame.
-    df = pd.read_csv(csv_file)
-    
+# instrumentation.py lives at the repository root.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import instrumentation
+from confidence import mean_ci
+from instrumentation import stage
+
+# Expected columns based on the tshark output:
+REQUIRED_FIELDS = ['frame.time_epoch', 'frame.len', 'ip.src', 'ip.dst',
+                   'tcp.srcport', 'tcp.dstport', 'tcp.len', '_ws.col.info']
+
+# Wireshark "Export Packet Dissections" columns and their tshark equivalents.
+WIRESHARK_COLUMNS = {'Time': 'frame.time_epoch', 'Length': 'frame.len', 'Source': 'ip.src',
+                     'Destination': 'ip.dst', 'Info': '_ws.col.info'}
+
+# pyarrow fails when one row straddles two read blocks, and Info fields in
+# the captures can run to a few kilobytes, so blocks are never smaller than this.
+PYARROW_BLOCK_BYTES = 1 << 20
+
+def ack_delays(data, acks):
+    """
+    Match each data segment to the first ACK from the peer that covers it.
+    Both frames must be sorted by time. ACK numbers are cumulative, so the
+    running maximum is monotonic and can be searched with searchsorted.
+    Returns an array of data-to-ACK latencies in seconds (NaN if never ACKed).
+    """
+    if data.empty or acks.empty:
+        return np.full(len(data), np.nan)
+    ack_times = acks['frame.time_epoch'].to_numpy()
+    acked_upto = np.maximum.accumulate(acks['tcp.ack'].to_numpy())
+    seq_end = (data['tcp.seq'] + data['tcp.len']).to_numpy()
+    idx = np.searchsorted(acked_upto, seq_end, side='left')
+    delays = np.full(len(data), np.nan)
+    matched = idx < len(ack_times)
+    delays[matched] = ack_times[idx[matched]] - data['frame.time_epoch'].to_numpy()[matched]
+    # A retransmission of data that was already ACKed has no meaningful delay.
+    delays[delays < 0] = np.nan
+    return delays
+
+def flow_label(df, reverse=False):
+    src = df['ip.src'].astype(str) + ':' + df['tcp.srcport'].astype(str)
+    dst = df['ip.dst'].astype(str) + ':' + df['tcp.dstport'].astype(str)
+    return dst + ' > ' + src if reverse else src + ' > ' + dst
+
+def segment_counts(data, write_size):
+    """Per-flow counts of single-write, coalesced and partial data segments."""
+    return pd.DataFrame({
+        'flow': data['flow'],
+        'segments': 1,
+        'payload': data['tcp.len'],
+        'single_write': data['tcp.len'] == write_size,
+        'coalesced': data['tcp.len'] > write_size,
+        'partial': data['tcp.len'] < write_size,
+    }).groupby('flow').sum()
+
+def coalescing_analysis(df, write_size=40, bucket=1.0):
+    """
+    Per-flow view of how application writes were packed into segments.
+    Expects the cleaned, time-sorted DataFrame built by analyze_csv and
+    works on a copy of it. Returns a dict with the segment-size histogram,
+    the bytes-per-segment time series, the ACK-delay samples and the
+    per-flow segment counts.
+    """
+    df = df.copy()
+    # tshark exports carry tcp.seq/tcp.ack; Wireshark GUI exports only have them in Info.
+    for field, label in (('tcp.seq', 'Seq'), ('tcp.ack', 'Ack')):
+        if field not in df.columns:
+            df[field] = df['_ws.col.info'].str.extract(label + r'=(\d+)', expand=False)
+        df[field] = pd.to_numeric(df[field], errors='coerce')
+
+    df['flow'] = flow_label(df)
+    df['reverse_flow'] = flow_label(df, reverse=True)
+    df['rel_time'] = df['frame.time_epoch'] - df['frame.time_epoch'].iloc[0]
+
+    data = df[df['tcp.len'] > 0]
+
+    # Segment-size histogram and bytes-per-segment over time, per flow.
+    histogram = data.groupby(['flow', 'tcp.len']).size().rename('segments')
+    time_bucket = (data['rel_time'] // bucket) * bucket
+    series = data.groupby(['flow', time_bucket])['tcp.len'].agg(['count', 'sum', 'mean'])
+    series.columns = ['segments', 'bytes', 'bytes_per_segment']
+
+    # Single writes versus segments that carry several coalesced writes.
+    counts = segment_counts(data, write_size)
+    counts['writes_per_segment'] = counts['payload'] / counts['segments'] / write_size
+
+    # Data-to-ACK latency: ACKs for a flow are the segments of its reverse direction.
+    delays = []
+    # Group the ACK rows once; each flow then looks up its reverse direction.
+    ack_groups = dict(tuple(df[df['tcp.ack'].notna()].groupby('flow')))
+    no_acks = df.iloc[:0]
+    for flow, flow_data in data[data['tcp.seq'].notna()].groupby('flow'):
+        reverse = flow_data['reverse_flow'].iloc[0]
+        flow_acks = ack_groups.get(reverse, no_acks)
+        delays.append(pd.DataFrame({
+            'flow': flow,
+            'rel_time': flow_data['rel_time'].to_numpy(),
+            'ack_delay': ack_delays(flow_data, flow_acks),
+        }))
+    delays = pd.concat(delays, ignore_index=True) if delays else \
+        pd.DataFrame(columns=['flow', 'rel_time', 'ack_delay'])
+    counts['ack_delay_median'] = delays.groupby('flow')['ack_delay'].median()
+    counts['ack_delay_p95'] = delays.groupby('flow')['ack_delay'].quantile(0.95)
+
+    return {'histogram': histogram, 'series': series, 'ack_delays': delays, 'counts': counts}
+
+def print_coalescing(result, write_size):
+    print(f"\n--- Segment Coalescing (write size {write_size} bytes) ---")
+    for flow, row in result['counts'].iterrows():
+        print(f"Flow {flow}")
+        print(f"  Data segments: {int(row['segments'])} "
+              f"({int(row['single_write'])} x {write_size}-byte, {int(row['coalesced'])} coalesced, "
+              f"{int(row['partial'])} partial)")
+        print(f"  Average writes per segment: {row['writes_per_segment']:.2f}")
+        print(f"  ACK delay: median {row['ack_delay_median'] * 1000:.2f} ms, "
+              f"p95 {row['ack_delay_p95'] * 1000:.2f} ms")
+        sizes = result['histogram'].loc[flow]
+        print("  Segment sizes: " + ", ".join(f"{int(size)}B x {count}" for size, count in sizes.items()))
+
+def plot_coalescing(result, write_size, rows):
+    import matplotlib.pyplot as plt
+
+    with stage('plot', rows=rows):
+        draw_coalescing(result, write_size)
+    plt.show()
+
+def draw_coalescing(result, write_size):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(3, 1, figsize=(10, 12))
+    for flow, sizes in result['histogram'].groupby(level='flow'):
+        sizes = sizes.droplevel('flow')
+        axes[0].bar(sizes.index.astype(str), sizes.values, label=flow)
+    axes[0].set_xlabel('Segment payload (bytes)')
+    axes[0].set_ylabel('Segments')
+    axes[0].set_title('Segment Size Histogram')
+
+    for flow, series in result['series'].groupby(level='flow'):
+        series = series.droplevel('flow')
+        axes[1].plot(series.index, series['bytes_per_segment'], marker='.', label=flow)
+    axes[1].axhline(y=write_size, color='red', linestyle='--', label='Single write')
+    axes[1].set_xlabel('Time (seconds)')
+    axes[1].set_ylabel('Bytes per segment')
+    axes[1].set_title('Bytes per Segment over Time')
+
+    delays = result['ack_delays'].dropna(subset=['ack_delay'])
+    for flow, flow_delays in delays.groupby('flow'):
+        axes[2].hist(flow_delays['ack_delay'] * 1000, bins=50, alpha=0.6, label=flow)
+    axes[2].set_xlabel('Data-to-ACK delay (ms)')
+    axes[2].set_ylabel('Segments')
+    axes[2].set_title('ACK Delay Distribution')
+
+    for ax in axes:
+        ax.legend()
+    plt.tight_layout()
+
+def info_overflows(csv_file):
+    """
+    tshark only quotes fields with -E quote=d, so an unquoted Info column
+    like "[PSH, ACK]" spills into extra fields. Detect that from the first row.
+    """
+    with open(csv_file, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        row = next(reader, [])
+    return len(row) > len(header)
+
+def read_chunks(csv_file, chunksize=None, use_pyarrow=False, block_bytes=PYARROW_BLOCK_BYTES):
+    """
+    Yield the raw CSV as DataFrames of at most chunksize rows, or as a
+    single DataFrame when chunksize is None. With use_pyarrow the chunks
+    are record batches of about block_bytes instead.
+    """
+    if info_overflows(csv_file):
+        # pyarrow cannot parse these files, but --pyarrow still means
+        # streaming: use row batches of roughly block_bytes each.
+        if use_pyarrow and not chunksize:
+            chunksize = max(block_bytes, PYARROW_BLOCK_BYTES) // 128
+        # Fold the spilled fields back into the last (Info) column.
+        with open(csv_file, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            n = len(header)
+            rows = []
+            for row in reader:
+                rows.append(row[:n - 1] + [','.join(row[n - 1:])])
+                if chunksize and len(rows) == chunksize:
+                    yield pd.DataFrame(rows, columns=header)
+                    rows = []
+            if rows or not chunksize:
+                yield pd.DataFrame(rows, columns=header)
+    elif use_pyarrow:
+        # Read every column as a string; types inferred from the first
+        # block may not fit later ones, and normalize_capture converts them.
+        import pyarrow as pa
+        import pyarrow.csv as pv
+        header = pd.read_csv(csv_file, nrows=0).columns
+        reader = pv.open_csv(csv_file,
+                             read_options=pv.ReadOptions(block_size=max(block_bytes, PYARROW_BLOCK_BYTES)),
+                             convert_options=pv.ConvertOptions(
+                                 column_types={name: pa.string() for name in header}))
+        for batch in reader:
+            yield batch.to_pandas()
+    elif chunksize:
+        yield from pd.read_csv(csv_file, chunksize=chunksize)
+    else:
+        yield pd.read_csv(csv_file)
+
+def normalize_capture(df):
+    """
+    Convert a raw chunk to the tshark field columns with numeric time and
+    lengths. Wireshark GUI exports are converted by parsing the Info
+    column. Returns None if required fields are missing.
+    """
     # Remove any leading/trailing whitespace from column names.
     df.columns = df.columns.str.strip()
-    
+
     # Uncomment the following line to debug and view the DataFrame's head.
     # print(df.head())
-    
-    # Expected columns based on the tshark output:
-    required_fields = ['frame.time_epoch', 'frame.len', 'ip.src', 'ip.dst',
-                       'tcp.srcport', 'tcp.dstport', 'tcp.len', '_ws.col.info']
-    for field in required_fields:
+
+    if 'Info' in df.columns and '_ws.col.info' not in df.columns:
+        if 'Protocol' in df.columns:
+            df = df[df['Protocol'] == 'TCP']
+        df = df.rename(columns=WIRESHARK_COLUMNS)
+        ports = df['_ws.col.info'].str.extract(r'(\d+)\s+(?:>|\u2192)\s+(\d+)\s+\[')
+        df['tcp.srcport'] = ports[0]
+        df['tcp.dstport'] = ports[1]
+        df['tcp.len'] = df['_ws.col.info'].str.extract(r'Len=(\d+)', expand=False)
+
+    for field in REQUIRED_FIELDS:
         if field not in df.columns:
             print(f"Field '{field}' is missing in the CSV. Check your tshark capture command.")
-            return
+            return None
 
     # Convert timestamp and length fields to numeric values.
     df['frame.time_epoch'] = pd.to_numeric(df['frame.time_epoch'], errors='coerce')
     df['frame.len'] = pd.to_numeric(df['frame.len'], errors='coerce')
     df['tcp.len'] = pd.to_numeric(df['tcp.len'], errors='coerce')
-    
+
     # Remove any rows where conversion failed.
-    df = df.dropna(subset=['frame.time_epoch', 'frame.len', 'tcp.len'])
-    
-    # Sort packets by timestamp.
-    df.sort_values(by='frame.time_epoch', inplace=True)
-    
+    return df.dropna(subset=['frame.time_epoch', 'frame.len', 'tcp.len'])
+
+def load_capture(csv_file):
+    """Load a whole capture into a cleaned, time-sorted DataFrame (None on error)."""
+    with stage('read') as read_stage:
+        raw = next(read_chunks(csv_file))
+        read_stage.rows = len(raw)
+    with stage('parse', rows=len(raw)):
+        df = normalize_capture(raw)
+        if df is None:
+            return None
+
+        # Sort packets by timestamp, unless the capture is already in order.
+        if not df['frame.time_epoch'].is_monotonic_increasing:
+            df = df.sort_values(by='frame.time_epoch')
+    return df
+
+def stream_metrics(csv_file, chunksize, write_size=40, use_pyarrow=False, block_bytes=PYARROW_BLOCK_BYTES):
+    """
+    Compute the capture_metrics values and per-flow segment counts from
+    running aggregates over chunks, so memory is bounded by the chunk size.
+    None of these aggregates depend on packet order, so no sort is needed.
+    Returns (metrics, counts, rows), where rows is the number of CSV rows
+    read, or None if required fields are missing.
+    """
+    time_min = np.inf
+    time_max = -np.inf
+    totals = {'total_bytes': 0, 'total_payload': 0, 'retransmissions': 0,
+              'data_packets': 0, 'max_packet_size': 0}
+    counts = None
+    rows = 0
+
+    for chunk in read_chunks(csv_file, chunksize, use_pyarrow, block_bytes):
+        rows += len(chunk)
+        df = normalize_capture(chunk)
+        if df is None:
+            return None
+        if df.empty:
+            continue
+        time_min = min(time_min, df['frame.time_epoch'].min())
+        time_max = max(time_max, df['frame.time_epoch'].max())
+        totals['total_bytes'] += int(df['frame.len'].sum())
+        totals['total_payload'] += int(df['tcp.len'].sum())
+        totals['retransmissions'] += int(
+            df['_ws.col.info'].str.contains("Retransmission", case=False, na=False).sum())
+        totals['data_packets'] += int((df['tcp.len'] > 0).sum())
+        totals['max_packet_size'] = max(totals['max_packet_size'], int(df['frame.len'].max()))
+
+        data = df[df['tcp.len'] > 0].assign(flow=flow_label)
+        chunk_counts = segment_counts(data, write_size)
+        counts = chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0)
+
+    if counts is None:
+        return {}, None, rows
+    duration = time_max - time_min
+    metrics = dict(totals, duration=duration)
+    metrics['throughput'] = totals['total_bytes'] / duration if duration > 0 else 0
+    metrics['goodput'] = totals['total_payload'] / duration if duration > 0 else 0
+    metrics['packet_loss_rate'] = (totals['retransmissions'] / totals['data_packets']) * 100 \
+        if totals['data_packets'] > 0 else 0
+    counts = counts.astype(int)
+    counts['writes_per_segment'] = counts['payload'] / counts['segments'] / write_size
+    return metrics, counts, rows
+
+def capture_metrics(df):
     # Calculate the capture duration.
     start_time = df['frame.time_epoch'].iloc[0]
     end_time = df['frame.time_epoch'].iloc[-1]
     duration = end_time - start_time
-    
+
     # --- Metric 1: Throughput ---
     # Throughput: Total frame bytes per second.
-    total_bytes = df['frame.len'].sum()
+    total_bytes = int(df['frame.len'].sum())
     throughput = total_bytes / duration if duration > 0 else 0
-    
+
     # --- Metric 2: Goodput ---
     # Goodput: Sum of TCP payload (tcp.len) per second.
-    total_payload = df['tcp.len'].sum()
+    total_payload = int(df['tcp.len'].sum())
     goodput = total_payload / duration if duration > 0 else 0
-    
+
     # --- Metric 3: Packet Loss Rate (approximate) ---
     # Approximate loss by counting segments marked as "Retransmission" in the info field.
     retransmissions = df['_ws.col.info'].str.contains("Retransmission", case=False, na=False).sum()
     data_packets = (df['tcp.len'] > 0).sum()
     packet_loss_rate = (retransmissions / data_packets) * 100 if data_packets > 0 else 0
-    
+
     # --- Metric 4: Maximum Packet Size ---
     max_packet_size = df['frame.len'].max()
-    
+
+    return {
+        'duration': duration,
+        'throughput': throughput,
+        'total_bytes': total_bytes,
+        'goodput': goodput,
+        'total_payload': total_payload,
+        'retransmissions': retransmissions,
+        'data_packets': data_packets,
+        'packet_loss_rate': packet_loss_rate,
+        'max_packet_size': max_packet_size,
+    }
+
+def print_metrics(metrics):
+    print(f"Capture Duration: {metrics['duration']:.2f} seconds")
+    print(f"Throughput: {metrics['throughput']:.2f} bytes/sec (Total bytes: {metrics['total_bytes']})")
+    print(f"Goodput: {metrics['goodput']:.2f} bytes/sec (Total payload: {metrics['total_payload']})")
+    print(f"Packet Loss Rate (approx.): {metrics['packet_loss_rate']:.2f}%")
+    print(f"Maximum Packet Size: {metrics['max_packet_size']} bytes")
+
+def print_flow_counts(counts, write_size):
+    print(f"\n--- Segments per Flow (write size {write_size} bytes) ---")
+    for flow, row in counts.iterrows():
+        print(f"Flow {flow}: {int(row['segments'])} data segments, {int(row['payload'])} bytes "
+              f"({int(row['single_write'])} x {write_size}-byte, {int(row['coalesced'])} coalesced, "
+              f"{int(row['partial'])} partial, {row['writes_per_segment']:.2f} writes/segment)")
+
+def analyze_csv(csv_file, write_size=40, bucket=1.0, plot=False, chunksize=None, use_pyarrow=False,
+                block_bytes=PYARROW_BLOCK_BYTES):
+    if chunksize or use_pyarrow:
+        # Streaming path: running aggregates only, no per-packet analysis.
+        # Reading, parsing and aggregation are interleaved, so they are one stage.
+        with stage('stream') as stream_stage:
+            result = stream_metrics(csv_file, chunksize, write_size=write_size,
+                                    use_pyarrow=use_pyarrow, block_bytes=block_bytes)
+            if result is None:
+                return None
+            metrics, counts, stream_stage.rows = result
+        if counts is None:
+            print("No TCP packets found in the CSV.")
+            return None
+        print_metrics(metrics)
+        print_flow_counts(counts, write_size)
+        return metrics
+
+    df = load_capture(csv_file)
+    if df is None:
+        return None
+    if df.empty:
+        print("No TCP packets found in the CSV.")
+        return None
+    with stage('aggregate', rows=len(df)):
+        metrics = capture_metrics(df)
+
+        # --- Segment coalescing and ACK delay per flow ---
+        result = coalescing_analysis(df, write_size=write_size, bucket=bucket)
+
     # Print out the metrics.
-    print(f"Capture Duration: {duration:.2f} seconds")
-    print(f"Throughput: {throughput:.2f} bytes/sec (Total bytes: {total_bytes})")
-    print(f"Goodput: {goodput:.2f} bytes/sec (Total payload: {total_payload})")
-    print(f"Packet Loss Rate (approx.): {packet_loss_rate:.2f}%")
-    print(f"Maximum Packet Size: {max_packet_size} bytes")
-    
+    print_metrics(metrics)
+    print_coalescing(result, write_size)
+    if plot:
+        plot_coalescing(result, write_size, rows=len(df))
+    return metrics
+
+def variant_name(csv_file):
+    # "both_enabled_trial3.csv" -> "both_enabled"
+    name = os.path.splitext(os.path.basename(csv_file))[0]
+    return re.sub(r'_trial\d+$', '', name)
+
+def collect_captures(paths):
+    """Group capture CSVs by variant; directories are expanded to their CSV files."""
+    variants = defaultdict(list)
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith('.csv'))
+        else:
+            files = [path]
+        for csv_file in files:
+            variants[variant_name(csv_file)].append(csv_file)
+    return variants
+
+def summarize_capture(csv_file, write_size=40, bucket=1.0):
+    """
+    Reduce one capture to a row of scalar metrics and a goodput timeline
+    aligned on connection-relative time (first SYN, or first packet).
+    Runs in a worker process, so only small results are sent back.
+    """
+    df = load_capture(csv_file)
+    if df is None or df.empty:
+        return None
+    row = capture_metrics(df)
+    result = coalescing_analysis(df, write_size=write_size, bucket=bucket)
+    counts = result['counts']
+    row['segments'] = counts['segments'].sum()
+    row['coalesced'] = counts['coalesced'].sum()
+    row['ack_delay_median'] = result['ack_delays']['ack_delay'].median()
+
+    syn = df['_ws.col.info'].str.contains(r'\[SYN\]', na=False)
+    conn_start = df.loc[syn, 'frame.time_epoch'].iloc[0] if syn.any() else df['frame.time_epoch'].iloc[0]
+    rel_time = df['frame.time_epoch'] - conn_start
+    # Completion time: last payload byte relative to connection start.
+    row['completion_time'] = rel_time[df['tcp.len'] > 0].max()
+    timeline = df['tcp.len'].groupby((rel_time // bucket) * bucket).sum() / bucket
+    return row, timeline
+
+COMPARE_METRICS = [
+    ('throughput', 'Throughput (B/s)', 1),
+    ('goodput', 'Goodput (B/s)', 1),
+    ('segments', 'Data segments', 1),
+    ('coalesced', 'Coalesced segments', 1),
+    ('completion_time', 'Completion time (s)', 1),
+    ('ack_delay_median', 'Median ACK delay (ms)', 1000),
+]
+
+def compare_captures(paths, write_size=40, bucket=1.0, baseline='both_enabled', plot=False, workers=None):
+    variants = collect_captures(paths)
+    jobs = [(variant, csv_file) for variant, files in variants.items() for csv_file in files]
+
+    # Captures are independent, so load and reduce them in parallel.
+    # Worker processes do not report their own stages; this times the whole pool.
+    with stage('compare', rows=len(jobs)), ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(summarize_capture, csv_file, write_size, bucket) for _, csv_file in jobs]
+        results = [future.result() for future in futures]
+
+    rows = defaultdict(list)
+    timelines = defaultdict(list)
+    for (variant, csv_file), result in zip(jobs, results):
+        if result is None:
+            print(f"Skipping {csv_file}")
+            continue
+        rows[variant].append(result[0])
+        timelines[variant].append(result[1])
+
+    table = []
+    for variant in sorted(rows):
+        trials = pd.DataFrame(rows[variant])
+        entry = {'variant': variant, 'trials': len(trials)}
+        for key, _, scale in COMPARE_METRICS:
+            entry[key], entry[key + '_ci'] = mean_ci(trials[key] * scale)
+        table.append(entry)
+    table = pd.DataFrame(table).set_index('variant')
+
+    # Latency deltas relative to the baseline variant.
+    if baseline in table.index:
+        for key in ('completion_time', 'ack_delay_median'):
+            table[key + '_delta'] = table[key] - table.loc[baseline, key]
+
+    print_comparison(table, baseline)
+    if plot:
+        plot_comparison(table, timelines, rows=len(table))
+    return table
+
+def print_comparison(table, baseline):
+    print(f"\n--- Variant Comparison (mean \u00b1 95% CI) ---")
+    for variant, entry in table.iterrows():
+        print(f"{variant} ({int(entry['trials'])} trial(s))")
+        for key, label, _ in COMPARE_METRICS:
+            ci = entry[key + '_ci']
+            ci_text = f" \u00b1 {ci:.2f}" if not np.isnan(ci) else ""
+            delta = f" (delta vs {baseline}: {entry[key + '_delta']:+.2f})" if key + '_delta' in entry else ""
+            print(f"  {label}: {entry[key]:.2f}{ci_text}{delta}")
+
+def plot_comparison(table, timelines, rows):
+    import matplotlib.pyplot as plt
+
+    with stage('plot', rows=rows):
+        draw_comparison(table, timelines)
+    plt.show()
+
+def draw_comparison(table, timelines):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(2, 1, figsize=(10, 10))
+    for variant, series in sorted(timelines.items()):
+        # Mean goodput per time bucket across trials, with a 95% CI band.
+        trials = pd.concat(series, axis=1).fillna(0)
+        stats = trials.apply(lambda r: pd.Series(mean_ci(r.to_numpy()), index=['mean', 'ci']), axis=1)
+        axes[0].plot(stats.index, stats['mean'], label=variant)
+        axes[0].fill_between(stats.index, stats['mean'] - stats['ci'].fillna(0),
+                             stats['mean'] + stats['ci'].fillna(0), alpha=0.2)
+    axes[0].set_xlabel('Time since connection start (seconds)')
+    axes[0].set_ylabel('Goodput (bytes/sec)')
+    axes[0].set_title('Goodput over Time')
+    axes[0].legend()
+
+    x = np.arange(len(table.index))
+    width = 0.8 / 3
+    for i, key in enumerate(['throughput', 'goodput', 'segments']):
+        axes[1].bar(x + i * width, table[key], width, yerr=table[key + '_ci'].fillna(0),
+                    capsize=3, label=key)
+    axes[1].set_xticks(x + width)
+    axes[1].set_xticklabels(table.index)
+    axes[1].set_title('Throughput, Goodput and Segment Counts per Variant')
+    axes[1].legend()
+
+    plt.tight_layout()
+
 def main():
     parser = argparse.ArgumentParser(description="Analyze tshark CSV capture for TCP metrics")
-    parser.add_argument("csv_file", help="Path to CSV file (e.g. /tmp/ns1_veth.csv)")
+    parser.add_argument("csv_files", nargs='+',
+                        help="Path to CSV file(s) (e.g. /tmp/ns1_veth.csv); directories are allowed with --compare")
+    parser.add_argument("--write-size", type=int, default=40,
+                        help="Application write size in bytes (default: 40)")
+    parser.add_argument("--bucket", type=float, default=1.0,
+                        help="Time bucket in seconds for the bytes-per-segment series (default: 1.0)")
+    parser.add_argument("--plot", action="store_true", help="Plot the analysis")
+    parser.add_argument("--compare", action="store_true",
+                        help="Compare variants side by side (files named <variant>[_trial<N>].csv)")
+    parser.add_argument("--baseline", default="both_enabled",
+                        help="Variant used as reference for latency deltas (default: both_enabled)")
+    parser.add_argument("--workers", type=int, help="Worker processes for --compare (default: CPU count)")
+    parser.add_argument("--chunksize", type=int,
+                        help="Stream the CSV in chunks of this many rows with bounded memory "
+                             "(reports aggregate metrics and per-flow counts only)")
+    parser.add_argument("--pyarrow", action="store_true", help="Stream the CSV with pyarrow's CSV reader")
+    parser.add_argument("--block-bytes", type=int, default=PYARROW_BLOCK_BYTES,
+                        help="Read block size in bytes for --pyarrow (default and minimum: 1 MiB)")
+    instrumentation.add_arguments(parser)
     args = parser.parse_args()
-    analyze_csv(args.csv_file)
+    instrumentation.enable_from_args(args)
+
+    if args.compare:
+        compare_captures(args.csv_files, write_size=args.write_size, bucket=args.bucket,
+                         baseline=args.baseline, plot=args.plot, workers=args.workers)
+        instrumentation.finish(args.instrument)
+        return
+    for csv_file in args.csv_files:
+        if len(args.csv_files) > 1:
+            print(f"\n=== {csv_file} ===")
+        analyze_csv(csv_file, write_size=args.write_size, bucket=args.bucket, plot=args.plot,
+                    chunksize=args.chunksize, use_pyarrow=args.pyarrow, block_bytes=args.block_bytes)
+    instrumentation.finish(args.instrument)
 
 if __name__ == '__main__':
     main()
@@ -49,6 +49,24 @@ sudo ip netns exec ns2 iptables -P INPUT ACCEPT
 sudo ip netns exec ns2 iptables -P OUTPUT ACCEPT
 sudo ip netns exec ns2 iptables -P FORWARD ACCEPT
 
+# (Optional) Emulate a WAN path on both veth ends, e.g. RTT_MS=50 LOSS_PCT=1 RATE=10mbit.
+# Half of the RTT is added in each direction; run_matrix.py can sweep these values.
+RTT_MS=${RTT_MS:-0}
+LOSS_PCT=${LOSS_PCT:-0}
+RATE=${RATE:-}
+if [ "$RTT_MS" != "0" ] || [ "$LOSS_PCT" != "0" ] || [ -n "$RATE" ]; then
+    echo "Shaping veth links: rtt=${RTT_MS}ms loss=${LOSS_PCT}% rate=${RATE:-unlimited}"
+    for pair in "ns1 veth-ns1" "ns2 veth-ns2"; do
+        set -- $pair
+        sudo ip netns exec $1 tc qdisc add dev $2 root handle 1: netem \
+            delay $(awk "BEGIN {print $RTT_MS / 2}")ms loss ${LOSS_PCT}%
+        if [ -n "$RATE" ]; then
+            sudo ip netns exec $1 tc qdisc add dev $2 parent 1: handle 2: tbf \
+                rate $RATE burst 32kbit latency 400ms
+        fi
+    done
+fi
+
 
 
 
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import queue
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sniffer import Sniffer
+
+# (result name, nagle, delayed_ack) for every combination of the experiment.
+COMBINATIONS = [
+    ('both_enabled', 'enabled', 'enabled'),
+    ('nagle_disabled', 'disabled', 'enabled'),
+    ('delayed_ACK_disabled', 'enabled', 'disabled'),
+    ('both_disabled', 'disabled', 'disabled'),
+]
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run(cmd, check=True):
+    return subprocess.run(cmd, check=check, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def lane_names(lane):
+    # Lane 0 keeps the names used by run_experiment.sh; extra lanes get a suffix.
+    suffix = '' if lane == 0 else '-{}'.format(lane)
+    return {
+        'server_ns': 'ns1' + suffix,
+        'client_ns': 'ns2' + suffix,
+        'server_if': 'veth-ns1' + suffix,
+        'client_if': 'veth-ns2' + suffix,
+        'server_ip': '10.0.{}.1'.format(lane),
+        'client_ip': '10.0.{}.2'.format(lane),
+    }
+
+
+def disable_firewall(ns):
+    for cmd in (['iptables', '-F'], ['iptables', '-X'],
+                ['iptables', '-t', 'nat', '-F'], ['iptables', '-t', 'nat', '-X'],
+                ['iptables', '-P', 'INPUT', 'ACCEPT'],
+                ['iptables', '-P', 'OUTPUT', 'ACCEPT'],
+                ['iptables', '-P', 'FORWARD', 'ACCEPT']):
+        run(['ip', 'netns', 'exec', ns] + cmd, check=False)
+
+
+def setup_lane(lane):
+    """Create a server/client namespace pair connected by a veth pair."""
+    n = lane_names(lane)
+    teardown_lane(lane)
+    run(['ip', 'netns', 'add', n['server_ns']])
+    run(['ip', 'netns', 'add', n['client_ns']])
+    run(['ip', 'link', 'add', n['server_if'], 'type', 'veth', 'peer', 'name', n['client_if']])
+    for ns, iface, ip in ((n['server_ns'], n['server_if'], n['server_ip']),
+                          (n['client_ns'], n['client_if'], n['client_ip'])):
+        run(['ip', 'link', 'set', iface, 'netns', ns])
+        run(['ip', 'netns', 'exec', ns, 'ip', 'link', 'set', 'lo', 'up'])
+        run(['ip', 'netns', 'exec', ns, 'ip', 'addr', 'add', ip + '/24', 'dev', iface])
+        run(['ip', 'netns', 'exec', ns, 'ip', 'link', 'set', iface, 'up'])
+        disable_firewall(ns)
+    return n
+
+
+def teardown_lane(lane):
+    n = lane_names(lane)
+    # Deleting a namespace also removes the veth end inside it.
+    run(['ip', 'netns', 'delete', n['server_ns']], check=False)
+    run(['ip', 'netns', 'delete', n['client_ns']], check=False)
+
+
+def shaping_tag(rtt, jitter, loss, rate):
+    """Directory name for one link profile, e.g. "rtt50ms_loss1pct"."""
+    parts = ['rtt{:g}ms'.format(rtt)]
+    if jitter:
+        parts.append('jitter{:g}ms'.format(jitter))
+    if loss:
+        parts.append('loss{:g}pct'.format(loss))
+    if rate:
+        parts.append('rate' + rate)
+    return '_'.join(parts)
+
+
+def apply_shaping(lane, rtt, jitter, loss, rate):
+    """
+    Emulate a WAN path on both veth ends with netem (delay, jitter, loss)
+    and an optional tbf child for the rate limit. Half of the RTT and
+    jitter is applied in each direction; loss applies per direction.
+    """
+    n = lane_names(lane)
+    for ns, iface in ((n['server_ns'], n['server_if']), (n['client_ns'], n['client_if'])):
+        tc = ['ip', 'netns', 'exec', ns, 'tc', 'qdisc']
+        run(tc + ['del', 'dev', iface, 'root'], check=False)
+        if not (rtt or jitter or loss or rate):
+            continue
+        netem = tc + ['add', 'dev', iface, 'root', 'handle', '1:', 'netem']
+        if rtt or jitter:
+            netem += ['delay', '{:g}ms'.format(rtt / 2)]
+            if jitter:
+                netem += ['{:g}ms'.format(jitter / 2), 'distribution', 'normal']
+        if loss:
+            netem += ['loss', '{:g}%'.format(loss)]
+        run(netem)
+        if rate:
+            run(tc + ['add', 'dev', iface, 'parent', '1:', 'handle', '2:',
+                      'tbf', 'rate', rate, 'burst', '32kbit', 'latency', '400ms'])
+
+
+def wait_for_listen(ns, port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        out = subprocess.run(['ip', 'netns', 'exec', ns, 'ss', '-Hltn', 'sport = :{}'.format(port)],
+                             capture_output=True, text=True).stdout
+        if out.strip():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def run_trial(lanes, name, nagle, delayed_ack, trial, out_dir, args):
+    lane = lanes.get()
+    n = lane_names(lane)
+    csv_file = os.path.join(out_dir, '{}_trial{}.csv'.format(name, trial))
+    log_file = os.path.join(out_dir, '{}_trial{}.log'.format(name, trial))
+    try:
+        print(f"[lane {lane}] {os.path.basename(out_dir)}/{name} trial {trial}: "
+              f"nagle={nagle} delayed_ack={delayed_ack}")
+        sniffer = Sniffer(n['server_ns'], n['server_if'], csv_file, args.port)
+        sniffer.start()
+        sniffer.ready.wait()
+        if sniffer.error:
+            raise RuntimeError("capture on {} failed: {}".format(n['server_if'], sniffer.error))
+
+        try:
+            with open(log_file, 'w') as log:
+                server = subprocess.Popen(
+                    ['ip', 'netns', 'exec', n['server_ns'], sys.executable, 'server.py',
+                     '--host', '0.0.0.0', '--port', str(args.port),
+                     '--nagle', nagle, '--delayed_ack', delayed_ack],
+                    cwd=SCRIPT_DIR, stdout=log, stderr=subprocess.STDOUT)
+                try:
+                    if not wait_for_listen(n['server_ns'], args.port):
+                        raise RuntimeError("server in {} did not start listening".format(n['server_ns']))
+                    subprocess.run(
+                        ['ip', 'netns', 'exec', n['client_ns'], sys.executable, 'client.py',
+                         '--server', n['server_ip'], '--port', str(args.port),
+                         '--nagle', nagle, '--delayed_ack', delayed_ack, '--file', args.file],
+                        cwd=SCRIPT_DIR, stdout=log, stderr=subprocess.STDOUT, check=True)
+                    server.wait(timeout=10)
+                finally:
+                    if server.poll() is None:
+                        server.kill()
+                        server.wait()
+            # Give the final FIN/ACK exchange time to reach the capture.
+            time.sleep(0.5)
+        finally:
+            # Stop the capture even when the trial fails, so it does not keep
+            # writing while the next trial on this lane starts its own sniffer.
+            sniffer.stop()
+        print(f"[lane {lane}] {name} trial {trial}: {sniffer.packets} segments -> {csv_file}")
+        return csv_file
+    finally:
+        lanes.put(lane)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run every Nagle x delayed-ACK combination in network namespaces and capture each run"
+    )
+    parser.add_argument("--trials", type=int, default=1, help="Trials per combination (default: 1)")
+    parser.add_argument("--parallel", type=int, default=1,
+                        help="Number of namespace pairs to run trials on concurrently (default: 1)")
+    parser.add_argument("--combos", nargs='+', choices=[c[0] for c in COMBINATIONS],
+                        default=[c[0] for c in COMBINATIONS], help="Combinations to run (default: all four)")
+    parser.add_argument("--port", type=int, default=5001, help="Server port (default: 5001)")
+    parser.add_argument("--file", default="data_4KB.bin", help="File sent by the client (default: data_4KB.bin)")
+    parser.add_argument("--out-dir", default="results", help="Directory for the capture CSVs (default: results)")
+    parser.add_argument("--keep-namespaces", action="store_true",
+                        help="Leave the namespaces in place after the run")
+    parser.add_argument("--rtt", type=float, nargs='+', default=[0],
+                        help="Round-trip times in ms to sweep, e.g. --rtt 0 20 100 (default: 0)")
+    parser.add_argument("--jitter", type=float, default=0, help="RTT jitter in ms (default: 0)")
+    parser.add_argument("--loss", type=float, default=0,
+                        help="Packet loss percentage in each direction (default: 0)")
+    parser.add_argument("--rate", help="Link rate limit as a tc rate, e.g. 10mbit (default: unlimited)")
+    args = parser.parse_args()
+
+    if os.geteuid() != 0:
+        print("Please run as root")
+        sys.exit(1)
+
+    args.out_dir = os.path.abspath(args.out_dir)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    # Namespaces are created once and reused by every trial scheduled on them.
+    lanes = queue.Queue()
+    for lane in range(args.parallel):
+        setup_lane(lane)
+        lanes.put(lane)
+
+    jobs = [(name, nagle, delayed_ack, trial)
+            for trial in range(1, args.trials + 1)
+            for name, nagle, delayed_ack in COMBINATIONS if name in args.combos]
+    shaped = len(args.rtt) > 1 or args.rtt[0] or args.jitter or args.loss or args.rate
+    total = failed = 0
+    try:
+        for rtt in args.rtt:
+            # Each link profile gets its own directory so analysis.py --compare
+            # can be pointed at one profile at a time.
+            out_dir = args.out_dir
+            if shaped:
+                out_dir = os.path.join(args.out_dir, shaping_tag(rtt, args.jitter, args.loss, args.rate))
+                os.makedirs(out_dir, exist_ok=True)
+            for lane in range(args.parallel):
+                apply_shaping(lane, rtt, args.jitter, args.loss, args.rate)
+
+            with ThreadPoolExecutor(max_workers=args.parallel) as pool:
+                futures = [pool.submit(run_trial, lanes, name, nagle, delayed_ack, trial, out_dir, args)
+                           for name, nagle, delayed_ack, trial in jobs]
+                for future in futures:
+                    total += 1
+                    try:
+                        future.result()
+                    except (RuntimeError, subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+                        failed += 1
+                        print(f"Trial failed: {e}")
+    finally:
+        if not args.keep_namespaces:
+            for lane in range(args.parallel):
+                teardown_lane(lane)
+
+    print(f"Experiment complete: {total - failed}/{total} trials captured in {args.out_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import ctypes
+import os
+import socket
+import struct
+import threading
+import time
+
+# Linux constants not exposed by the socket module.
+ETH_P_ALL = 0x0003
+CLONE_NEWNET = 0x40000000
+# SO_TIMESTAMPNS doubles as the control message type (SCM_TIMESTAMPNS).
+SO_TIMESTAMPNS = getattr(socket, 'SO_TIMESTAMPNS', 35)
+# struct timespec: time_t seconds and long nanoseconds.
+TIMESPEC = struct.Struct('@ll')
+
+# Column layout matches the tshark fields expected by analysis.py.
+CSV_FIELDS = ['frame.time_epoch', 'frame.len', 'ip.src', 'ip.dst',
+              'tcp.srcport', 'tcp.dstport', 'tcp.len', 'tcp.seq', 'tcp.ack',
+              'tcp.flags', '_ws.col.info']
+
+FLAG_NAMES = [(0x01, 'FIN'), (0x02, 'SYN'), (0x04, 'RST'),
+              (0x08, 'PSH'), (0x10, 'ACK'), (0x20, 'URG')]
+
+
+def enter_netns(netns):
+    """
+    Move the calling thread into the named network namespace.
+    setns() only affects the current thread, so the rest of the
+    process stays in the namespace it was started in.
+    """
+    libc = ctypes.CDLL('libc.so.6', use_errno=True)
+    fd = os.open(os.path.join('/var/run/netns', netns), os.O_RDONLY)
+    try:
+        if libc.setns(fd, CLONE_NEWNET) != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, "setns({}) failed: {}".format(netns, os.strerror(errno)))
+    finally:
+        os.close(fd)
+
+
+def format_flags(flags):
+    # Wireshark lists PSH/SYN/FIN/RST before ACK, e.g. "[PSH, ACK]".
+    names = [name for bit, name in FLAG_NAMES if flags & bit and name != 'ACK']
+    if flags & 0x10:
+        names.append('ACK')
+    return ', '.join(names)
+
+
+def decode_frame(frame):
+    """
+    Decode an Ethernet/IPv4/TCP frame.
+    Returns (src_ip, dst_ip, src_port, dst_port, seq, ack, flags, window, payload_len)
+    or None for anything that is not TCP over IPv4.
+    """
+    if len(frame) < 14 + 20 or frame[12:14] != b'\x08\x00':
+        return None
+    ip = frame[14:]
+    ihl = (ip[0] & 0x0F) * 4
+    if ip[9] != socket.IPPROTO_TCP or len(ip) < ihl + 20:
+        return None
+    total_len = struct.unpack('!H', ip[2:4])[0]
+    src_ip = socket.inet_ntoa(ip[12:16])
+    dst_ip = socket.inet_ntoa(ip[16:20])
+    tcp = ip[ihl:]
+    src_port, dst_port, seq, ack, offset, flags, window = struct.unpack('!HHIIBBH', tcp[:16])
+    data_offset = (offset >> 4) * 4
+    payload_len = max(total_len - ihl - data_offset, 0)
+    return src_ip, dst_ip, src_port, dst_port, seq, ack, flags, window, payload_len
+
+
+def kernel_timestamp(ancdata):
+    """
+    Receive time from the SCM_TIMESTAMPNS control message, falling back to
+    the current time if the kernel did not attach one.
+    """
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS and len(data) >= TIMESPEC.size:
+            seconds, nanoseconds = TIMESPEC.unpack_from(data)
+            return seconds + nanoseconds * 1e-9
+    return time.time()
+
+
+class Sniffer(threading.Thread):
+    """
+    In-process packet capture on one interface of a network namespace.
+    Each TCP segment is written as a CSV row with relative sequence
+    numbers, so the output can be fed straight into analysis.py.
+    """
+
+    def __init__(self, netns, iface, csv_file, port=None):
+        super().__init__(daemon=True)
+        self.netns = netns
+        self.iface = iface
+        self.csv_file = csv_file
+        self.port = port
+        self.ready = threading.Event()
+        self.stop_event = threading.Event()
+        self.error = None
+        self.packets = 0
+        # Per-direction initial sequence number and highest sequence sent.
+        self.isn = {}
+        self.highest_seq = {}
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+    def run(self):
+        try:
+            if self.netns:
+                enter_netns(self.netns)
+            sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+            sock.bind((self.iface, ETH_P_ALL))
+            # Have the kernel stamp each frame on receipt, so the time does
+            # not include the wait for this thread to be scheduled.
+            sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+            sock.settimeout(0.2)
+        except OSError as e:
+            self.error = e
+            self.ready.set()
+            return
+
+        with sock, open(self.csv_file, 'w', newline='') as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+            writer.writerow(CSV_FIELDS)
+            self.ready.set()
+            while not self.stop_event.is_set():
+                try:
+                    frame, ancdata, _, _ = sock.recvmsg(65535, socket.CMSG_SPACE(TIMESPEC.size))
+                except socket.timeout:
+                    continue
+                timestamp = kernel_timestamp(ancdata)
+                row = self.to_row(timestamp, frame)
+                if row is not None:
+                    writer.writerow(row)
+                    self.packets += 1
+
+    def to_row(self, timestamp, frame):
+        decoded = decode_frame(frame)
+        if decoded is None:
+            return None
+        src_ip, dst_ip, src_port, dst_port, seq, ack, flags, window, payload_len = decoded
+        if self.port is not None and self.port not in (src_port, dst_port):
+            return None
+
+        direction = (src_ip, src_port, dst_ip, dst_port)
+        reverse = (dst_ip, dst_port, src_ip, src_port)
+        if flags & 0x02 or direction not in self.isn:
+            self.isn[direction] = seq
+        rel_seq = (seq - self.isn[direction]) & 0xFFFFFFFF
+        rel_ack = (ack - self.isn[reverse]) & 0xFFFFFFFF if reverse in self.isn else ack
+
+        # Mark data that does not advance the stream as a retransmission,
+        # the same label analysis.py looks for in Wireshark exports.
+        seq_end = rel_seq + payload_len
+        prefix = ''
+        if payload_len > 0 and seq_end <= self.highest_seq.get(direction, 0):
+            prefix = '[TCP Retransmission] '
+        self.highest_seq[direction] = max(self.highest_seq.get(direction, 0), seq_end)
+
+        info = "{}{}  >  {} [{}] Seq={} Ack={} Win={} Len={}".format(
+            prefix, src_port, dst_port, format_flags(flags), rel_seq, rel_ack, window, payload_len)
+        return [timestamp, len(frame), src_ip, dst_ip, src_port, dst_port,
+                payload_len, rel_seq, rel_ack, '0x{:04x}'.format(flags), info]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture TCP segments on an interface into a CSV file")
+    parser.add_argument("--netns", help="Network namespace to capture in (default: current)")
+    parser.add_argument("--iface", required=True, help="Interface to capture on (e.g. veth-ns1)")
+    parser.add_argument("--port", type=int, help="Only keep segments to/from this TCP port")
+    parser.add_argument("--duration", type=float, default=150, help="Capture duration in seconds (default: 150)")
+    parser.add_argument("csv_file", help="Output CSV file")
+    args = parser.parse_args()
+
+    sniffer = Sniffer(args.netns, args.iface, args.csv_file, args.port)
+    sniffer.start()
+    sniffer.ready.wait()
+    if sniffer.error:
+        print(f"Capture failed: {sniffer.error}")
+        return
+    time.sleep(args.duration)
+    sniffer.stop()
+    print(f"Captured {sniffer.packets} TCP segments into {args.csv_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Student t confidence intervals shared by the experiment scripts.
+
+Question_1/custom_topology.py uses mean_ci to decide when a run's goodput
+has converged, and Question_3/analysis.py to summarise repeated trials.
+"""
+import numpy as np
+
+# Two-sided 95% Student t critical values (index = degrees of freedom).
+T_CRITICAL_95 = [np.nan, 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+                 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+                 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+# Past the table mean_ci falls back to the normal critical value, which
+# understates the half-width by less than 4% (2.042 vs 1.96 at 30 d.o.f.).
+Z_CRITICAL_95 = 1.96
+
+
+def mean_ci(values):
+    """Mean and 95% confidence half-width of values, ignoring NaNs."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if n == 0:
+        return np.nan, np.nan
+    if n == 1:
+        return values[0], np.nan
+    t = T_CRITICAL_95[n - 1] if n - 1 < len(T_CRITICAL_95) else Z_CRITICAL_95
+    return values.mean(), t * values.std(ddof=1) / np.sqrt(n)
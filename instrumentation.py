@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Opt-in timing hooks for the analysis scripts.
+
+Wrap each stage of an analyzer in `with stage('read') as s:` and set
+`s.rows` inside the block. Nothing is recorded until enable() is called;
+when disabled, stage() returns a shared no-op object, so the hooks can stay
+on hot paths.
+"""
+import json
+import resource
+import sys
+import time
+
+
+class _Stage:
+    __slots__ = ('name', 'rows', 'start', 'wall', 'peak')
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        if _state['memory']:
+            reset_peak_rss()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.start
+        self.peak = peak_rss() if _state['memory'] else None
+        _state['stages'].append(self)
+        return False
+
+
+class _NullStage:
+    __slots__ = ('rows',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def reset_peak_rss():
+    # Writing 5 to clear_refs resets the kernel's RSS high-water mark (Linux 4.0+).
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss():
+    """Peak resident set size in bytes since the last reset (or process start)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS, and is never reset.
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+_NULL_STAGE = _NullStage()
+_state = {'enabled': False, 'memory': False, 'stages': [], 'profiler': None, 'profile_out': None}
+
+
+def stage(name, rows=None):
+    if not _state['enabled']:
+        return _NULL_STAGE
+    return _Stage(name, rows)
+
+
+def enable(memory=True, profile_out=None):
+    """
+    Start recording stages. With memory=True each stage also reports the
+    peak RSS of the process while it ran (the parent only; pool workers
+    are not included). profile_out writes a profile of the whole run when finish() is called:
+    a pyinstrument HTML report for *.html, a cProfile dump otherwise.
+    """
+    _state['enabled'] = True
+    _state['memory'] = memory
+    if profile_out:
+        if profile_out.endswith('.html'):
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        _state['profiler'] = profiler
+        _state['profile_out'] = profile_out
+
+
+def summary():
+    stages = []
+    for s in _state['stages']:
+        entry = {'stage': s.name, 'wall_s': round(s.wall, 6)}
+        if s.rows is not None:
+            entry['rows'] = int(s.rows)
+            entry['rows_per_s'] = round(s.rows / s.wall, 1) if s.wall > 0 else None
+        if s.peak is not None:
+            entry['peak_rss_bytes'] = s.peak
+        stages.append(entry)
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'stages': stages,
+        'total_wall_s': round(sum(s.wall for s in _state['stages']), 6),
+        'max_rss_bytes': maxrss if sys.platform == 'darwin' else maxrss * 1024,
+    }
+
+
+def finish(summary_out=None):
+    """Stop profiling and write the JSON summary (to stdout when summary_out is '-')."""
+    if not _state['enabled']:
+        return None
+    profiler = _state['profiler']
+    if profiler is not None:
+        if _state['profile_out'].endswith('.html'):
+            profiler.stop()
+            with open(_state['profile_out'], 'w') as f:
+                f.write(profiler.output_html())
+        else:
+            profiler.disable()
+            profiler.dump_stats(_state['profile_out'])
+    result = summary()
+    if summary_out == '-':
+        print(json.dumps(result, indent=2))
+    elif summary_out:
+        with open(summary_out, 'w') as f:
+            json.dump(result, f, indent=2)
+    return result
+
+
+def add_arguments(parser):
+    parser.add_argument("--instrument", metavar="SUMMARY",
+                        help="Record per-stage wall time, rows/sec and peak memory; "
+                             "write the JSON summary to SUMMARY ('-' for stdout)")
+    parser.add_argument("--profile", metavar="OUT",
+                        help="Also profile the run: pyinstrument HTML for *.html, cProfile dump otherwise")
+
+
+def enable_from_args(args):
+    if args.instrument or args.profile:
+        enable(profile_out=args.profile)